@@ -8,6 +8,7 @@ The Containermanager class allows to create container networks, list all
 running containers and stop them.
 """
 
+import subprocess
 from time import time, sleep
 from typing import List, Tuple, Optional
 from bench_executor.logger import Logger
@@ -18,6 +19,11 @@ TIMEOUT_TIME = 600  # seconds
 NETWORK_NAME = 'bench_executor'
 
 
+class ContainerTimeoutError(TimeoutError):
+    """Raised when a container did not exit before its timeout expired."""
+    pass
+
+
 class ContainerManager():
     """Manage containers and networks."""
 
@@ -203,7 +209,8 @@ class Container():
             self._logger.error(line)
         return False
 
-    def run_and_wait_for_exit(self, command: str = '') -> bool:
+    def run_and_wait_for_exit(self, command: str = '',
+                              timeout: Optional[float] = None) -> bool:
         """Run the container and wait for exit
 
         This blocks until the container exit and gives a status code.
@@ -213,6 +220,9 @@ class Container():
         command : str
             The command to execute in the container, optionally and defaults to
             no command.
+        timeout : Optional[float]
+            Seconds to wait for the container to exit before killing it and
+            raising ContainerTimeoutError, default unlimited.
 
         Returns
         -------
@@ -226,7 +236,18 @@ class Container():
             self._logger.error('Container is not initialized yet')
             return False
 
-        status_code = self._docker.wait(self._container_id)
+        try:
+            status_code = self._docker.wait(self._container_id, timeout)
+        except subprocess.TimeoutExpired:
+            self._logger.error(f'Container "{self._name}" did not exit '
+                               f'within {timeout}s, killing it')
+            # Collect the logs before the container is removed, they are
+            # the only diagnostics left after a timeout
+            for line in self._docker.logs(self._container_id):
+                self._logger.error(line)
+            self._docker.kill(self._container_id)
+            raise ContainerTimeoutError(f'Timeout ({timeout}s) reached for '
+                                        f'container "{self._name}"')
         logs = self._docker.logs(self._container_id)
         if logs is not None:
             for line in logs:
@@ -9,7 +9,7 @@ which is similar has serious issues with resource leaking for years.
 import json
 import subprocess
 from time import sleep
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from bench_executor.logger import Logger
 
 
@@ -44,13 +44,17 @@ class Docker():
 
         return status_code
 
-    def wait(self, container_id: str) -> int:
+    def wait(self, container_id: str,
+             timeout: Optional[float] = None) -> int:
         """Wait for Docker container to exit.
 
         Parameters
         ----------
         container_id : str
             ID of the Docker container.
+        timeout : Optional[float]
+            Seconds to wait for the container to exit before raising
+            subprocess.TimeoutExpired, default unlimited.
 
         Returns
         -------
@@ -60,9 +64,40 @@ class Docker():
 
         cmd = f'docker wait "{container_id}"'
         self._logger.debug(f'Waiting for Docker container: {cmd}')
+        process = subprocess.run(cmd, shell=True, capture_output=True,
+                                 timeout=timeout)
+
+        return process.returncode
+
+    def kill(self, container_id: str) -> bool:
+        """Kill a running Docker container immediately.
+
+        In contrast to stopping a container, killing does not wait for the
+        container to shut down gracefully.
+
+        Parameters
+        ----------
+        container_id : str
+            ID of the Docker container.
+
+        Returns
+        -------
+        success : bool
+            True if killing the container was successful.
+        """
+
+        cmd = f'docker kill "{container_id}"'
+        self._logger.debug(f'Killing Docker container: {cmd}')
         status_code, output = subprocess.getstatusoutput(cmd)
 
-        return status_code
+        if status_code != 0:
+            return False
+
+        cmd = f'docker rm "{container_id}"'
+        self._logger.debug(f'Removing Docker container: {cmd}')
+        status_code, output = subprocess.getstatusoutput(cmd)
+
+        return status_code == 0
 
     def stop(self, container_id: str) -> bool:
         """Stop a running Docker container.
@@ -179,10 +214,13 @@ class Docker():
         if must_pull:
             self.pull(image)
 
-        # Avoid race condition between removing and starting the same container
+        # Avoid race condition between removing and starting the same
+        # container. Match the name exactly, a substring match would also
+        # hit sibling containers such as "Morph-KGC-10" for "Morph-KGC-1".
         removing = False
         while (True):
-            cmd = f'docker ps -a | grep "{name}"'
+            cmd = 'docker ps -a --format "{{.Names}}" | ' + \
+                  f'grep -x "{name}"'
             status_code, output = subprocess.getstatusoutput(cmd)
             if status_code == 0 and not removing:
                 cmd = f'docker stop "{name}" && docker rm "{name}"'
@@ -10,20 +10,138 @@ languages.
 """
 
 import os
-import configparser
-from timeout_decorator import timeout, TimeoutError  # type: ignore
+import shutil
+import hashlib
+import tempfile
+import functools
+from glob import glob
+from string import Template
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import Optional
-from bench_executor.container import Container
+from bench_executor.container import Container, ContainerTimeoutError
 from bench_executor.logger import Logger
 
 VERSION = '2.2.0'
 TIMEOUT = 3 * 3600  # 6 hours
 
+# INI configuration file template, the schema is fixed so the template is
+# compiled once at import time and only substituted per execution.
+_INI_TEMPLATE = Template('[CONFIGURATION]\n'
+                         'output_format=$output_format\n'
+                         '$output_line\n'
+                         '\n'
+                         '[DataSource0]\n'
+                         'mappings=/data/shared/$mapping_file\n'
+                         '$db_line')
+
+# Benchmarks instantiate the same container many times per run, cache the
+# resolved paths and created directories across instances.
+_ABS_CACHE: dict = {}
+_MKDIR_CACHE: set = set()
+
+
+def _abspath(path: str) -> str:
+    """Resolve a path, cached across instances.
+
+    Only absolute inputs are cached: the resolution of a relative path
+    depends on the current working directory, which may change.
+    """
+    if not os.path.isabs(path):
+        return os.path.abspath(path)
+    if path not in _ABS_CACHE:
+        _ABS_CACHE[path] = os.path.abspath(path)
+    return _ABS_CACHE[path]
+
+
+def _makedirs(path: str) -> None:
+    """Create a directory once, cached across instances."""
+    if path in _MKDIR_CACHE:
+        return
+    os.makedirs(path, exist_ok=True)
+    _MKDIR_CACHE.add(path)
+
+
+@functools.lru_cache(maxsize=64)
+def _rdb_dsn(rdb_type: Optional[str], rdb_username: Optional[str],
+             rdb_password: Optional[str], rdb_host: Optional[str],
+             rdb_port: Optional[int], rdb_name: Optional[str],
+             flavor: str = 'sqlalchemy') -> Optional[str]:
+    """Build the DSN for a relational database, memoized across calls.
+
+    Parameters
+    ----------
+    rdb_type : Optional[str]
+        Database type, 'MySQL' or 'PostgreSQL'.
+    rdb_username : Optional[str]
+        Username for the database.
+    rdb_password : Optional[str]
+        Password for the database.
+    rdb_host : Optional[str]
+        Hostname for the database.
+    rdb_port : Optional[int]
+        Port for the database.
+    rdb_name : Optional[str]
+        Database name for the database.
+    flavor : str
+        DSN flavor: 'sqlalchemy' as used by Morph-KGC or 'jdbc' as used by
+        JVM-based tools, default 'sqlalchemy'.
+
+    Returns
+    -------
+    dsn : Optional[str]
+        The DSN for the database, None if any connection detail is missing.
+    """
+    if None in (rdb_type, rdb_username, rdb_password, rdb_host, rdb_port,
+                rdb_name):
+        return None
+
+    if flavor == 'sqlalchemy':
+        if rdb_type == 'MySQL':
+            protocol = 'mysql+pymysql'
+        elif rdb_type == 'PostgreSQL':
+            protocol = 'postgresql+psycopg2'
+        else:
+            raise ValueError(f'Unknown RDB type: "{rdb_type}"')
+        return f'{protocol}://{rdb_username}:{rdb_password}' + \
+               f'@{rdb_host}:{rdb_port}/{rdb_name}'
+
+    parameters = ''
+    if rdb_type == 'MySQL':
+        protocol = 'jdbc:mysql'
+        parameters = '?allowPublicKeyRetrieval=true&useSSL=false'
+    elif rdb_type == 'PostgreSQL':
+        protocol = 'jdbc:postgresql'
+    else:
+        raise ValueError(f'Unknown RDB type: "{rdb_type}"')
+    return f'{protocol}://{rdb_host}:{rdb_port}/{rdb_name}{parameters}'
+
+
+def _mapping_sig(path: str) -> tuple:
+    """Stat signature of a mapping file.
+
+    The signature identifies a mapping file without reading its content.
+    It keys the output cache and detects mapping changes between runs,
+    so it is deliberately not memoized: a cached result would hide edits
+    to the file.
+
+    Parameters
+    ----------
+    path : str
+        Path to the mapping file.
+
+    Returns
+    -------
+    signature : tuple
+        The path, size and modification time of the mapping file.
+    """
+    st = os.stat(path)
+    return (path, st.st_size, st.st_mtime_ns)
+
 
 class MorphKGC(Container):
     """Morph-KGC container for executing R2RML, RML, and RML-star mappings."""
     def __init__(self, data_path: str, config_path: str, directory: str,
-                 verbose: bool):
+                 verbose: bool, instance: Optional[int] = None):
         """Creates an instance of the MorphKGC class.
 
         Parameters
@@ -36,15 +154,27 @@ class MorphKGC(Container):
             Path to the directory to store logs.
         verbose : bool
             Enable verbose logs.
+        instance : Optional[int]
+            Instance number when multiple instances run in parallel, used
+            to give each instance its own subdirectory and container name.
+            Default a single instance.
         """
-        self._data_path = os.path.abspath(data_path)
-        self._config_path = os.path.abspath(config_path)
+        self._data_path = _abspath(data_path)
+        self._config_path = _abspath(config_path)
         self._logger = Logger(__name__, directory, verbose)
+        self._last_config_hash: Optional[str] = None
+        self._instance = instance
+        self._subdir = 'morphkgc'
+        name = 'Morph-KGC'
+        if instance is not None:
+            self._subdir = f'morphkgc-{instance}'
+            name = f'Morph-KGC-{instance}'
+        self._made: set = set()
         os.umask(0)
-        os.makedirs(os.path.join(self._data_path, 'morphkgc'), exist_ok=True)
-        super().__init__(f'kgconstruct/morph-kgc:v{VERSION}', 'Morph-KGC',
+        self._mk_once(os.path.join(self._data_path, self._subdir))
+        super().__init__(f'kgconstruct/morph-kgc:v{VERSION}', name,
                          self._logger,
-                         volumes=[f'{self._data_path}/morphkgc:/data',
+                         volumes=[f'{self._data_path}/{self._subdir}:/data',
                                   f'{self._data_path}/shared:/data/shared'])
 
     @property
@@ -59,7 +189,19 @@ class MorphKGC(Container):
         """
         return __name__.lower()
 
-    @timeout(TIMEOUT)
+    def _mk_once(self, path: str) -> None:
+        """Create a directory once per instance, skipping repeat syscalls.
+
+        Parameters
+        ----------
+        path : str
+            Path to the directory to create.
+        """
+        if path in self._made:
+            return
+        _makedirs(path)
+        self._made.add(path)
+
     def _execute_with_timeout(self, arguments) -> bool:
         """Execute a mapping with a provided timeout.
 
@@ -69,7 +211,7 @@ class MorphKGC(Container):
             Whether the execution was successfull or not.
         """
         cmd = 'python3 -m morph_kgc /data/config_morphkgc.ini'
-        success = self.run_and_wait_for_exit(cmd)
+        success = self.run_and_wait_for_exit(cmd, timeout=TIMEOUT)
 
         return success
 
@@ -88,7 +230,7 @@ class MorphKGC(Container):
         """
         try:
             return self._execute_with_timeout(arguments)
-        except TimeoutError:
+        except ContainerTimeoutError:
             msg = f'Timeout ({TIMEOUT}s) reached for Morph-KGC'
             self._logger.warning(msg)
 
@@ -104,7 +246,8 @@ class MorphKGC(Container):
                         rdb_port: Optional[int] = None,
                         rdb_name: Optional[str] = None,
                         rdb_type: Optional[str] = None,
-                        multiple_files: bool = False) -> bool:
+                        multiple_files: bool = False,
+                        use_cache: bool = False) -> bool:
         """Execute a mapping file with Morph-KGC.
 
         Morph-KGC can transform SQL relational databases (MySQL, PostgreSQL,
@@ -118,7 +261,12 @@ class MorphKGC(Container):
         and RDF-Star output.
 
         Morph-KGC can generate all triples in a single file or spread it
-        among multiple files.
+        among multiple files. In both cases the engine streams each mapping
+        partition to disk as it is generated instead of buffering all
+        triples in memory, which bounds the peak memory usage for large
+        mappings. When a single file is requested, the partitions are
+        written to a dedicated directory and concatenated afterwards, which
+        is trivial for the line-based N-Triples and N-Quads serializations.
 
         Parameters
         ----------
@@ -145,8 +293,14 @@ class MorphKGC(Container):
         rdb_type : Optional[str]
             Database type, required when a database is used as source.
         multiple_files : bool
-            If the generated triples must be stored in multiple files, default
-            a single file.
+            If the generated triples must be stored in multiple files,
+            default a single file. The single file is assembled by
+            concatenating the partitioned output files after the run.
+        use_cache : bool
+            Reuse the cached output of a previous run when the
+            configuration and mapping file are unchanged, default off.
+            Keep this off when measuring the engine: a cache hit skips
+            the execution entirely and invalidates the metrics.
 
         Returns
         -------
@@ -162,40 +316,200 @@ class MorphKGC(Container):
             raise NotImplementedError('Unsupported serialization:'
                                       f'"{serialization}"')
 
-        # Generate INI configuration file since no CLI is available
-        config = configparser.ConfigParser()
-        config['CONFIGURATION'] = {
-            'output_format': serialization
-        }
-        config['DataSource0'] = {
-            'mappings': f'/data/shared/{mapping_file}'
-        }
-
-        # Morph-KGC can keep the mapping partition results separate, provide
-        # this option, default OFF
+        # Always let Morph-KGC stream the mapping partition results to
+        # separate files, a single output_file would force the engine to
+        # buffer all triples in memory before dumping them. The shared
+        # directory also holds input files and output of other tools, so
+        # for a single output file the partitions go into a dedicated
+        # directory which is merged afterwards.
+        parts_dir = None
         if multiple_files:
-            config['CONFIGURATION']['output_dir'] = '/data/shared/'
-        else:
-            config['CONFIGURATION']['output_file'] = \
-                    f'/data/shared/{output_file}'
-
-        if rdb_username is not None and rdb_password is not None \
-                and rdb_host is not None and rdb_port is not None \
-                and rdb_name is not None and rdb_type is not None:
-            if rdb_type == 'MySQL':
-                protocol = 'mysql+pymysql'
-            elif rdb_type == 'PostgreSQL':
-                protocol = 'postgresql+psycopg2'
+            if self._instance is None:
+                output_line = 'output_dir=/data/shared/'
             else:
-                raise ValueError(f'Unknown RDB type: "{rdb_type}"')
-            rdb_dsn = f'{protocol}://{rdb_username}:{rdb_password}' + \
-                      f'@{rdb_host}:{rdb_port}/{rdb_name}'
-            config['DataSource0']['db_url'] = rdb_dsn
+                # Parallel instances each write into their own directory,
+                # interleaving partitions of several mappings in the shared
+                # directory would mix up their outputs.
+                os.makedirs(os.path.join(self._data_path, 'shared',
+                                         self._subdir), exist_ok=True)
+                output_line = f'output_dir=/data/shared/{self._subdir}/'
+        else:
+            parts_name = f'{output_file}.parts'
+            if self._instance is not None:
+                parts_name = f'{output_file}.parts-{self._instance}'
+            parts_dir = os.path.join(self._data_path, 'shared', parts_name)
+            output_line = f'output_dir=/data/shared/{parts_name}/'
 
-        os.umask(0)
-        os.makedirs(os.path.join(self._data_path, 'morphkgc'), exist_ok=True)
-        path = os.path.join(self._data_path, 'morphkgc', 'config_morphkgc.ini')
-        with open(path, 'w') as f:
-            config.write(f)
+        db_line = ''
+        rdb_dsn = _rdb_dsn(rdb_type, rdb_username, rdb_password, rdb_host,
+                           rdb_port, rdb_name)
+        if rdb_dsn is not None:
+            db_line = f'db_url={rdb_dsn}\n'
+
+        # Generate INI configuration file since no CLI is available. The
+        # schema is fixed, a template is much cheaper than ConfigParser.
+        config_text = _INI_TEMPLATE.substitute(output_format=serialization,
+                                               output_line=output_line,
+                                               mapping_file=mapping_file,
+                                               db_line=db_line)
+
+        # Sweeps re-execute the same (configuration, mapping) combination,
+        # the output cannot differ then. When the caller opts in,
+        # fingerprint both and reuse the cached output on a hit instead of
+        # running the container again. Off by default: a cache hit skips
+        # the measured execution.
+        cache_path = None
+        mapping_path = os.path.join(self._data_path, 'shared', mapping_file)
+        output_path = os.path.join(self._data_path, 'shared', output_file)
+        if use_cache and not multiple_files and os.path.isfile(mapping_path):
+            signature = _mapping_sig(mapping_path)
+            key = hashlib.sha256(config_text.encode()
+                                 + repr(signature).encode()).hexdigest()
+            cache_path = os.path.join(self._data_path, self._subdir,
+                                      '.cache', key)
+            if os.path.isfile(cache_path) and os.path.getmtime(cache_path) \
+                    >= os.path.getmtime(mapping_path):
+                self._logger.info('Reusing cached output for mapping '
+                                  f'"{mapping_file}"')
+                shutil.copy(cache_path, output_path)
+                return True
+
+        # Create a fresh partition directory only when the engine actually
+        # runs: a cache hit must not touch the shared directory, and
+        # leftovers of a failed run must not leak into the merge.
+        if parts_dir is not None:
+            if os.path.isdir(parts_dir):
+                shutil.rmtree(parts_dir)
+            os.makedirs(parts_dir)
+
+        path = os.path.join(self._data_path, self._subdir,
+                            'config_morphkgc.ini')
+
+        # Repeated runs often reuse the same configuration, skip the disk
+        # write when the file on disk already matches.
+        config_hash = hashlib.sha256(config_text.encode()).hexdigest()
+        if config_hash != self._last_config_hash or not os.path.exists(path):
+            self._write_config(path, config_text.encode())
+            self._last_config_hash = config_hash
+
+        success = self.execute([])
+        if success and parts_dir is not None:
+            self._merge_output_files(output_file, parts_dir)
+            if cache_path is not None:
+                self._mk_once(os.path.dirname(cache_path))
+                shutil.copy(output_path, cache_path)
+
+        return success
+
+    @classmethod
+    def execute_mappings_parallel(cls, data_path: str, config_path: str,
+                                  directory: str, verbose: bool, cases: list,
+                                  max_workers: Optional[int] = None) -> bool:
+        """Execute multiple independent mappings in parallel.
+
+        Each mapping runs in its own container under a separate worker
+        process with a unique subdirectory: configuration files, partition
+        directories and multiple-file output directories are all isolated
+        per instance. Single-file outputs still land in the shared
+        directory under their own name, so each case must use a distinct
+        output_file. The Docker daemon of the host is shared, only the
+        work inside the containers runs in parallel.
+
+        Parameters
+        ----------
+        data_path : str
+            Path to the data directory of the case.
+        config_path : str
+            Path to the config directory of the case.
+        directory : str
+            Path to the directory to store logs.
+        verbose : bool
+            Enable verbose logs.
+        cases : list
+            List of dictionaries with keyword arguments for
+            execute_mapping, one per mapping. The output_file of each case
+            must be unique.
+        max_workers : Optional[int]
+            Number of worker processes, default the number of CPU cores.
+
+        Returns
+        -------
+        success : bool
+            Whether all executions were successfull or not.
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count()
+
+        success = True
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_execute_mapping_worker, data_path,
+                                   config_path, directory, verbose, index,
+                                   parameters)
+                       for index, parameters in enumerate(cases)]
+            for future in as_completed(futures):
+                success = future.result() and success
+
+        return success
+
+    def _write_config(self, path: str, data: bytes) -> None:
+        """Write the configuration file atomically.
+
+        The file is written next to its destination and moved into place
+        with a rename: writing in place on a bind-mounted volume can
+        trigger a sync on close from the container runtime, and the
+        temporary file must live on the same filesystem for the rename to
+        be atomic.
+
+        Parameters
+        ----------
+        path : str
+            Path to the configuration file.
+        data : bytes
+            Content of the configuration file.
+        """
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        os.chmod(tmp, 0o666)
+        os.replace(tmp, path)
+
+    def _merge_output_files(self, output_file: str, parts_dir: str) -> None:
+        """Concatenate the partitioned output files into a single file.
+
+        Parameters
+        ----------
+        output_file : str
+            Name of the single output file to assemble.
+        parts_dir : str
+            Path to the directory holding the partitioned output files.
+        """
+        output_path = os.path.join(self._data_path, 'shared', output_file)
+        parts = sorted(glob(os.path.join(parts_dir, '*')))
+        with open(output_path, 'wb') as target:
+            for part in parts:
+                with open(part, 'rb') as source:
+                    shutil.copyfileobj(source, target, 1024 * 1024)
+                os.remove(part)
+        os.rmdir(parts_dir)
+
+
+def _execute_mapping_worker(data_path: str, config_path: str, directory: str,
+                            verbose: bool, instance: int,
+                            parameters: dict) -> bool:
+    """Execute a single mapping in a worker process.
 
-        return self.execute([])
+    Module-level so it can be pickled by ProcessPoolExecutor.
+    """
+    morphkgc = MorphKGC(data_path, config_path, directory, verbose,
+                        instance=instance)
+    success = False
+    try:
+        success = morphkgc.execute_mapping(**parameters)
+    finally:
+        # The container is only removed on success, a leftover container
+        # of a failed run would block siblings reusing the same name
+        if not success:
+            morphkgc.stop()
+    return success
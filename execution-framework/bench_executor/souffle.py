@@ -3,16 +3,20 @@ The Souffle reasoner.
 """
 
 import os
+import shlex
 import psutil
 from typing import Optional
-from timeout_decorator import timeout, TimeoutError  # type: ignore
-from bench_executor.container import Container
+from bench_executor.container import Container, ContainerTimeoutError
 from bench_executor.logger import Logger
+from bench_executor.morphkgc import _rdb_dsn, _mapping_sig, _abspath, \
+        _makedirs
 
 VERSION = '1.0.0'
 
 TIMEOUT = 3 * 3600  # 3 hours
 
+CGROUP_MEMORY_LIMIT_FILE = '/sys/fs/cgroup/memory.max'
+
 
 
 class Souffle(Container):
@@ -33,17 +37,20 @@ class Souffle(Container):
         verbose : bool
             Enable verbose logs.
         """
-        self._data_path = os.path.abspath(data_path)
-        self._config_path = os.path.abspath(config_path)
+        self._data_path = _abspath(data_path)
+        self._config_path = _abspath(config_path)
         self._logger = Logger(__name__, directory, verbose)
         self._verbose = verbose
-        
-        os.makedirs(os.path.join(self._data_path, 'souffle'), exist_ok=True)
+        self._max_heap_mb: Optional[int] = None
+        self._last_mapping_sig: Optional[tuple] = None
+        self._made: set = set()
+
+        self._mk_once(os.path.join(self._data_path, 'souffle'))
         super().__init__(f'alloka/souffle:v{VERSION}', 'Souffle',
                          self._logger,
                          volumes=[f'{self._data_path}/souffle:/data',
                                   f'{self._data_path}/shared:/data/shared'])
-        print('INIT')
+        self._logger.debug('Souffle initialized')
 
     @property
     def root_mount_directory(self) -> str:
@@ -57,10 +64,50 @@ class Souffle(Container):
         """
         return __name__.lower()
 
-    @timeout(TIMEOUT)
+    def _mk_once(self, path: str) -> None:
+        """Create a directory once per instance, skipping repeat syscalls.
 
-    def _execute_with_timeout(self, cmd1: str) -> bool:
+        Parameters
+        ----------
+        path : str
+            Path to the directory to create.
+        """
+        if path in self._made:
+            return
+        _makedirs(path)
+        self._made.add(path)
+
+    def _get_max_heap_mb(self) -> int:
+        """JVM heap size in MiB, based upon the available memory.
+
+        The available memory is used instead of the total physical memory:
+        total memory ignores cgroup limits inside containers and overcommits
+        on shared hosts, which triggers swapping or the OOM killer. The
+        cgroup memory limit is applied as upper bound when one is set.
+
+        Returns
+        -------
+        max_heap_mb : int
+            JVM heap size in MiB.
+        """
+        if self._max_heap_mb is not None:
+            return self._max_heap_mb
 
+        max_heap = int(psutil.virtual_memory().available * 0.75)
+        try:
+            with open(CGROUP_MEMORY_LIMIT_FILE) as f:
+                limit = f.read().strip()
+            if limit != 'max':
+                max_heap = min(max_heap, int(limit))
+        except (FileNotFoundError, ValueError):
+            pass
+
+        self._max_heap_mb = max_heap // (1024 * 1024)
+        self._logger.info(f'Sizing JVM heap to {self._max_heap_mb}m')
+
+        return self._max_heap_mb
+
+    def _execute_with_timeout(self, cmd1: str) -> bool:
         """Execute a mapping with a provided timeout.
 
         Returns
@@ -68,13 +115,9 @@ class Souffle(Container):
         success : bool
             Whether the execution was successfull or not.
         """
-        self._logger.info(f'Executing Souffle with arguments '
-                          f'{" ".join(arguments)}')
-
-        # Execute command
+        self._logger.info(f'Executing Souffle with command "{cmd1}"')
 
-        cmd = cmd1
-        return self.run_and_wait_for_exit(cmd1)
+        return self.run_and_wait_for_exit(cmd1, timeout=TIMEOUT)
 
 
     def execute(self, arguments: list) -> bool:
@@ -90,9 +133,10 @@ class Souffle(Container):
         success : bool
             Whether the execution succeeded or not.
         """
+        cmd = ' '.join(arguments)
         try:
-            return self._execute_with_timeout(arguments)
-        except TimeoutError:
+            return self._execute_with_timeout(cmd)
+        except ContainerTimeoutError:
             msg = f'Timeout ({TIMEOUT}s) reached for Souffle'
             self._logger.warning(msg)
 
@@ -120,57 +164,46 @@ class Souffle(Container):
             Whether the execution was successfull or not.
         """
 
-        max_heap = int(psutil.virtual_memory().total * (1/2))
-
-        # Execute command
-        arguments1 = ['']  # Output directory
-        if rdb_username is not None and rdb_password is not None \
-                and rdb_host is not None and rdb_port is not None \
-                and rdb_name is not None and rdb_type is not None:
-
-            arguments1.append('-u ')
-            arguments1.append(rdb_username)
-            arguments1.append('-p ')
-            arguments1.append(rdb_password)
-
-            parameters = ''
-            if rdb_type == 'MySQL':
-                protocol = 'jdbc:mysql'
-                parameters = '?allowPublicKeyRetrieval=true&useSSL=false'
-            elif rdb_type == 'PostgreSQL':
-                protocol = 'jdbc:postgresql'
-            else:
-                raise ValueError(f'Unknown RDB type: "{rdb_type}"')
-            rdb_dsn = f'\'{protocol}://{rdb_host}:{rdb_port}/' + \
-                      f'{rdb_name}{parameters}\''
-            arguments1.append('-dsn ')
-            arguments1.append(rdb_dsn)
-        cmd1 = f'java -Xmx{max_heap} -Xms{max_heap}' + \
-              ' -jar rulegen.jar -m '+ os.path.join('/data/shared/', mapping_file)+ \
-              f'{" ".join(arguments1)}'     
-        #self.run_and_wait_for_exit(cmd1)
-        arguments = ['', os.path.join('/data/shared/Datalog_rules.rs'),
-             ' -D', '/data/shared/']  # Output directory
-        # if rdb_username is not None and rdb_password is not None \
-        #         and rdb_host is not None and rdb_port is not None \
-        #         and rdb_name is not None and rdb_type is not None:
-
-        #     arguments.append('-u')
-        #     arguments.append(rdb_username)
-        #     arguments.append('-p')
-        #     arguments.append(rdb_password)
-
-        #     parameters = ''
-        #     if rdb_type == 'MySQL':
-        #         protocol = 'jdbc:mysql'
-        #         parameters = '?allowPublicKeyRetrieval=true&useSSL=false'
-        #     elif rdb_type == 'PostgreSQL':
-        #         protocol = 'jdbc:postgresql'
-        #     else:
-        #         raise ValueError(f'Unknown RDB type: "{rdb_type}"')
-        #     rdb_dsn = f'\'{protocol}://{rdb_host}:{rdb_port}/' + \
-        #               f'{rdb_name}{parameters}\''
-        #     arguments.append('-dsn')
-        #     arguments.append(rdb_dsn)
-
-        return self._execute_with_timeout(cmd1)
+        max_heap = self._get_max_heap_mb()
+
+        # Track the mapping signature to spot repeated runs of the same
+        # mapping in the logs, the signature also keys the rulegen hash.
+        mapping_path = os.path.join(self._data_path, 'shared', mapping_file)
+        if os.path.isfile(mapping_path):
+            signature = _mapping_sig(mapping_path)
+            if signature == self._last_mapping_sig:
+                self._logger.debug(f'Mapping "{mapping_file}" unchanged '
+                                   'since previous run')
+            self._last_mapping_sig = signature
+
+        # Build the rulegen command from a flat argument list, shlex.join
+        # quotes arguments such as passwords containing spaces correctly.
+        parts = ['java', f'-Xmx{max_heap}m', f'-Xms{max_heap}m',
+                 '-jar', 'rulegen.jar',
+                 '-m', os.path.join('/data/shared/', mapping_file)]
+        rdb_dsn = _rdb_dsn(rdb_type, rdb_username, rdb_password, rdb_host,
+                           rdb_port, rdb_name, flavor='jdbc')
+        if rdb_dsn is not None and rdb_username is not None \
+                and rdb_password is not None:
+            parts += ['-u', rdb_username, '-p', rdb_password,
+                      '-dsn', rdb_dsn]
+        cmd1 = shlex.join(parts)
+
+        # Pipe the generated rules straight into the Souffle interpreter
+        # within a single container run. Writing Datalog_rules.rs to disk
+        # first would add an intermediate file write and read, and
+        # serialize rule generation and rule parsing. Quote the pipeline
+        # as a whole: the Docker wrapper interpolates the command into a
+        # host shell string, a double-quoted pipeline would be expanded by
+        # the host shell instead of inside the container.
+        pipeline = f'{cmd1} --stdout | souffle /dev/stdin ' + \
+                   '-j $(nproc) -D /data/shared/'
+        full_cmd = 'sh -c ' + shlex.quote(pipeline)
+
+        try:
+            return self._execute_with_timeout(full_cmd)
+        except ContainerTimeoutError:
+            msg = f'Timeout ({TIMEOUT}s) reached for Souffle'
+            self._logger.warning(msg)
+
+        return False